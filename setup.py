@@ -92,13 +92,14 @@ setup(
     #
     # For an analysis of "install_requires" vs pip's requirements files see:
     # https://packaging.python.org/en/latest/requirements.html
-    install_requires=['numpy>=1.12', 'scipy>=1.0', 'h5py>=2.10', 'snewpy~=1.1.0'],  # Optional
+    install_requires=['numpy>=1.17', 'scipy>=1.0', 'h5py>=2.10', 'snewpy~=1.1.0'],  # Optional
 
     # Additional groups of dependencies (e.g. for development).
     # Users can install these using the "extras" syntax, for example:
     #   $ pip install sntools[dev]
     extras_require={  # Optional
         # 'dev': ['black', 'flake8'],
+        'numba': ['numba'],  # speeds up cross section calculations, if available
     },
 
     # If there are data files included in your packages that need to be
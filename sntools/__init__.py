@@ -58,7 +58,7 @@ def setup():
     with open('outfile.kin', 'r') as f:
         output_sha = hashlib.sha256(f.read().encode('utf-8')).hexdigest()
 
-    test_sha = "4424b738d32b6c4baa459fb6fb76d63f944b572a02d319bde4fd247a520f1e29"
+    test_sha = "1a1970cf4ae3c1e2a1bee556854d2d6bd3c5758a16b1ba272d359b39c3b0caeb"
     if output_sha == test_sha:
         tryprint(u"\u2705", "[SUCCESS]")
         print("Everything seems to work fine. Enjoy using sntools!")
@@ -1,12 +1,18 @@
 #!/usr/bin/python
 
-from math import pi, sin, cos, acos
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+from math import pi
 import numpy as np
 import random
-from scipy import integrate, interpolate
+from scipy import interpolate
 
+# Nodes and weights of the Gauss-Legendre quadrature rule on [-1, 1] used for all integrations.
+# Cross sections and fluxes are smooth enough that a fixed-order rule is very accurate.
+gl_nodes, gl_weights = np.polynomial.legendre.leggauss(48)
 
-def gen_evts(_channel, _flux, n_targets, seed, verbose):
+
+def gen_evts(_channel, _flux, n_targets, seed, verbose, max_workers=1):
     """Generate events.
 
     * Get event rate by interpolating from time steps in the input data.
@@ -17,29 +23,31 @@ def gen_evts(_channel, _flux, n_targets, seed, verbose):
     _channel -- BaseChannel instance for the current interaction channel
     _flux -- BaseFlux instance with appropriate flavor and time range (includes weighting due to flux transformation and distance)
     n_targets -- number of target particles in detector
-    seed -- random number seed to reproducibly generate events
+    seed -- numpy.random.SeedSequence (or integer seed) to reproducibly generate events
+    verbose -- verbosity level (or None)
+    max_workers -- number of processes used to generate events in different time bins in parallel
     """
-    random.seed(seed)
-    np.random.seed(int(seed))
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    rng = np.random.default_rng(seed)
 
-    global channel, cached_flux, flux
-    flux = _flux
-    channel = _channel
+    set_up(_channel, _flux)
     tag = str(channel.__class__).split('.')[-2]
     if tag in ('c12nc', 'es'):
         tag += '-' + str(channel).split("'")[-2]
 
-    # ddEventRate(eE, eNu, time) is called hundreds of times for each generated event,
-    # often with identical eNu and time values (when integrating over eE).
-    # To save time, we cache results in a dictionary.
-    cached_flux = {}
-
-    # integrate over eE and then eNu to obtain the event rate at time t
+    # Integrate over eE at fixed nodes in eNu. The cross section does not depend on time,
+    # so this is done only once and reused when integrating over eNu at each time t.
     if verbose:
         print(f"[{tag}] Calculating event rate for {flux} ...")
-    raw_nevts = [n_targets * integrate.nquad(ddEventRate, [channel.bounds_eE, channel.bounds_eNu], args=[t], opts=[channel._opts, {}])[0]
-                 for t in flux.raw_times]
-    event_rate = interpolate.pchip(flux.raw_times, raw_nevts)
+    eNu_nodes, eNu_weights = gauss_legendre(*channel.bounds_eNu)
+    sigma = np.array([sigma_eNu(eNu) for eNu in eNu_nodes])
+    # Include number of targets and quadrature weights once, instead of for each time step
+    weighted_sigma = n_targets * eNu_weights * sigma
+    # Tabulate the flux at all combinations of input time steps and eNu nodes
+    raw_flux = np.array([flux.nu_emission(eNu_nodes, t) for t in flux.raw_times])
+    raw_nevts = raw_flux @ weighted_sigma
+    event_rate = interpolate.PchipInterpolator(flux.raw_times, raw_nevts)
 
     bin_width = 1  # in ms
     n_bins = int((flux.endtime - flux.starttime) / bin_width)  # number of full-width bins; int() implies floor()
@@ -48,88 +56,224 @@ def gen_evts(_channel, _flux, n_targets, seed, verbose):
 
     # scipy is optimized for operating on large arrays, making it orders of
     # magnitude faster to pre-compute all values of the interpolated functions.
-    binned_t = [flux.starttime + (i + 0.5) * bin_width for i in range(n_bins)]
-    binned_nevt_th = event_rate(binned_t)
-    # check for unphysical values of interpolated function event_rate(t)
-    for _i, _n in enumerate(binned_nevt_th):
-        if _n < 0:
-            binned_nevt_th[_i] = 0
-    binned_nevt = np.random.poisson(binned_nevt_th)  # Get random number of events in each bin from Poisson distribution
+    binned_t = flux.starttime + (np.arange(n_bins) + 0.5) * bin_width
+    binned_nevt_th = np.clip(event_rate(binned_t), 0, None)  # remove unphysical values of interpolated function event_rate(t)
+    binned_nevt = rng.poisson(binned_nevt_th)  # Get random number of events in each bin from Poisson distribution
     flux.prepare_evt_gen(binned_t)  # give flux script a chance to pre-compute values
 
-    events = []
-    for i in range(n_bins):
-        t0 = flux.starttime + i * bin_width
+    # The cross section does not depend on time, so tabulate it only once and reuse it for all time bins.
+    sigma_grid = np.array([sigma_eNu(eNu) for eNu in eNu_grid]) if binned_nevt.any() else None
 
-        if verbose and i % (10 ** (4 - verbose)) == 0:
-            print(f"[{tag}] {t0}-{t0 + bin_width} ms: {binned_nevt[i]} events ({binned_nevt_th[i]:.5f} expected)")
+    # Time bins are independent of each other, so we can generate events for them in parallel.
+    # Each time bin uses its own independent random number streams (one for numpy, one for the random module),
+    # so results do not depend on the number of workers.
+    bin_seeds = seed.spawn(2 * n_bins)
+    bins = [(i, flux.starttime + i * bin_width, binned_t[i], binned_nevt[i], binned_nevt_th[i], bin_seeds[2 * i: 2 * i + 2])
+            for i in range(n_bins)]
+    if max_workers > 1:
+        chunksize = max(1, n_bins // (4 * max_workers))
+        chunks = [bins[j:j + chunksize] for j in range(0, n_bins, chunksize)]
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(partial(gen_evts_in_bins, channel, flux, sigma_grid, tag, bin_width, verbose), chunks))
+        events = [evt for chunk_events in results for evt in chunk_events]
+    else:
+        events = gen_evts_in_bins(channel, flux, sigma_grid, tag, bin_width, verbose, bins)
 
-        # generate events in this time bin
-        for _ in range(binned_nevt[i]):
-            eNu = get_eNu(binned_t[i])
-            direction = get_direction(eNu)  # (dirx, diry, dirz)
-            evt = channel.generate_event(eNu, *direction)
-            evt.time = t0 + random.random() * bin_width
-            events.append(evt)
+    # Events are returned in order of their time bins. Distribute them uniformly within each bin.
+    bin_starts = flux.starttime + np.arange(n_bins) * bin_width
+    times = np.repeat(bin_starts, binned_nevt) + rng.uniform(0, bin_width, len(events))
+    for (evt, time) in zip(events, times.tolist()):
+        evt.time = time
 
     print(f"[{tag}] Generated {sum(binned_nevt)} particles (expected: {sum(binned_nevt_th):.2f} particles)")
 
     return events
 
 
+def gen_evts_in_bins(_channel, _flux, sigma_grid, tag, bin_width, verbose, bins):
+    """Generate events in the given time bins (without setting their time).
+
+    Arguments:
+    _channel -- BaseChannel instance for the current interaction channel
+    _flux -- BaseFlux instance with appropriate flavor and time range
+    sigma_grid -- cross section (integrated over eE) at the values in eNu_grid
+    tag -- name of the current interaction channel, for printing
+    bin_width -- width of time bins in ms
+    verbose -- verbosity level (or None)
+    bins -- list of tuples (index, start time, central time, number of events, expected number of events,
+            pair of SeedSequences for numpy and for the random module)
+    """
+    set_up(_channel, _flux)  # needed when running in a separate worker process
+
+    n_total = sum(n_evts for (_, _, _, n_evts, _, _) in bins)
+    if n_total == 0:
+        return []
+
+    # Sample properties of all events first and store them in arrays ...
+    eNus, cosTs, phis = np.empty(n_total), np.empty(n_total), np.empty(n_total)
+    bin_slices = []
+    k = 0
+    for (i, t0, t, n_evts, n_evts_th, (np_seed, random_seed)) in bins:
+        if verbose and i % (10 ** (4 - verbose)) == 0:
+            print(f"[{tag}] {t0}-{t0 + bin_width} ms: {n_evts} events ({n_evts_th:.5f} expected)")
+
+        if n_evts == 0:
+            continue
+
+        # Draw all random numbers needed for this time bin at once.
+        rng = np.random.default_rng(np_seed)
+        s = slice(k, k + n_evts)
+        # All events in this time bin share the same energy distribution, so tabulate it only once.
+        eNus[s] = get_eNu(rng.random(n_evts), eNu_table(t, sigma_grid))
+        cosTs[s] = [get_cosT(eNu, u) for (eNu, u) in zip(eNus[s], rng.random(n_evts))]
+        phis[s] = rng.uniform(0, 2 * pi, n_evts)
+        bin_slices.append((random_seed, s))
+        k += n_evts
+
+    # ... then calculate directions for all events at once.
+    # (Assumes that incoming neutrino moves in z direction.)
+    sinTs = np.sqrt(1 - cosTs**2)
+    dirxs = sinTs * np.cos(phis)
+    dirys = sinTs * np.sin(phis)
+
+    events = []
+    for (random_seed, s) in bin_slices:
+        random.seed(int(random_seed.generate_state(1)[0]))  # generate_event() uses the random module for some channels
+        for (eNu, dirx, diry, dirz) in zip(eNus[s].tolist(), dirxs[s].tolist(), dirys[s].tolist(), cosTs[s].tolist()):
+            events.append(channel.generate_event(eNu, dirx, diry, dirz))
+    return events
+
+
+def set_up(_channel, _flux):
+    """Set global state used by the helper functions below."""
+    global channel, cosT_grid, cosT_table, dSigma_dCosT, dSigma_dE, eNu_grid, flux
+    same_channel = repr(_channel) == repr(globals().get('channel'))
+    flux = _flux
+    channel = _channel
+
+    # dSigma_dE(eNu, eE) and dSigma_dCosT(eNu, cosT) are called many times for each
+    # generated event, mostly with arrays of eE (e.g. at the nodes of a Gauss-Legendre
+    # quadrature rule) or cosT values.
+    dSigma_dE = np.vectorize(channel.dSigma_dE, otypes=[float])
+    dSigma_dCosT = np.vectorize(channel.dSigma_dCosT, otypes=[float])
+
+    # Values of eNu at which the energy distribution of events is tabulated for sampling
+    eNu_grid = np.linspace(*channel.bounds_eNu, 256)
+
+    # Values of cosT at which the angular distribution is tabulated for sampling. These are denser
+    # near -1 and 1, where it may be sharply peaked (e.g. for elastic scattering), and exclude
+    # -1, 0 and 1, where some cross sections are numerically unstable. For each value in eNu_grid,
+    # the distribution is only tabulated once it is needed, then cached. It doesn't depend on the
+    # flux, so the cache is kept if the channel is unchanged (e.g. when a worker process generates
+    # events for several chunks of time bins).
+    cosT_grid = -np.cos(pi * (np.arange(256) + 0.5) / 256)
+    if not same_channel:
+        cosT_table = lru_cache(maxsize=None)(_cosT_table)
+
+
 # Helper functions
-def ddEventRate(eE, eNu, time):
-    """Double differential event rate."""
-    if (eNu, time) not in cached_flux:
-        cached_flux[(eNu, time)] = flux.nu_emission(eNu, time)
-    return channel.dSigma_dE(eNu, eE) * cached_flux[(eNu, time)]
-
-
-def rejection_sample(dist, min_val, max_val, n_bins=100):
-    """Sample value from an arbitrary distribution."""
-    p_max = 0
-    j_max = 0
-    bin_width = float(max_val - min_val) / n_bins
-
-    # Iterative approach to speed up finding the maximum of `dist`.
-    # Assumes that `dist` does not oscillate very quickly.
-    # First, use coarse binning to find the approximate maximum:
-    for j in range(0, n_bins, 10):
-        val = min_val + bin_width * (j + 0.5)
-        p = dist(val)
-        if p > p_max:
-            p_max = p
-            j_max = j
-    # Then, use finer binning around the approximate maximum.
-    for j in range(max(j_max - 9, 0), min(j_max + 10, n_bins)):
-        val = min_val + bin_width * (j + 0.5)
-        p = dist(val)
-        if p > p_max:
-            p_max = p
-
-    while True:
-        val = min_val + (max_val - min_val) * random.random()
-        if p_max * random.random() < dist(val):
-            break
-
-    return val
-
-
-def get_eNu(time):
-    """Get energy of interacting neutrino using rejection sampling."""
-    def dist(eNu):
-        return integrate.quad(ddEventRate, *channel.bounds_eE(eNu), args=(eNu, time), points=channel._opts(eNu)["points"])[0]
-    eNu = rejection_sample(dist, *channel.bounds_eNu, n_bins=200)
+def gauss_legendre(min_val, max_val, points=()):
+    """Return nodes and weights to integrate a function over [min_val, max_val].
+
+    The interval is split at the given points (e.g. discontinuities of the
+    integrand) and a Gauss-Legendre rule is applied to each subinterval.
+    """
+    edges = np.array([min_val] + sorted(p for p in points if min_val < p < max_val) + [max_val])
+    half_widths = (edges[1:] - edges[:-1]) / 2
+    midpoints = (edges[1:] + edges[:-1]) / 2
+    nodes = (midpoints[:, None] + half_widths[:, None] * gl_nodes).ravel()
+    weights = (half_widths[:, None] * gl_weights).ravel()
+    return nodes, weights
+
+
+def integrate_eE(f, eNu):
+    """Integrate f(eNu, eE) over the kinematically allowed range of eE."""
+    eE_nodes, eE_weights = gauss_legendre(*channel.bounds_eE(eNu), channel._opts(eNu)["points"])
+    return np.dot(eE_weights, f(eNu, eE_nodes))
+
+
+def sigma_eNu(eNu):
+    """Cross section as a function of neutrino energy (integrated over eE)."""
+    return integrate_eE(dSigma_dE, eNu)
+
+
+def tabulate(x, pdf):
+    """Return pdf and cumulative distribution at the values in x, both normalized to 1.
+
+    Between values in x, the pdf is interpolated linearly, so the cdf is calculated exactly using the trapezoidal rule.
+    """
+    cdf = np.concatenate(([0], np.cumsum((pdf[1:] + pdf[:-1]) * np.diff(x) / 2)))
+    return pdf / cdf[-1], cdf / cdf[-1]
+
+
+def inverse_cdf(u, x, table):
+    """Return value(s) of x for which the cumulative distribution equals u.
+
+    Arguments:
+    u -- uniformly distributed random number(s) in [0, 1)
+    x -- values at which the distribution is tabulated
+    table -- tuple of pdf and cdf at the values in x, as returned by tabulate()
+    """
+    pdf, cdf = table
+    j = np.clip(np.searchsorted(cdf, u, side='right') - 1, 0, len(x) - 2)
+    x0, dx, p0, dp = x[j], x[j + 1] - x[j], pdf[j], pdf[j + 1] - pdf[j]
+    # Within each interval, the pdf is linear, so the cdf is a quadratic polynomial in x - x0.
+    # Solve for x - x0, using a form that is numerically stable even if the pdf is (nearly) constant.
+    du = u - cdf[j]
+    denominator = p0 + np.sqrt(np.clip(p0**2 + 2 * du * dp / dx, 0, None))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dx_u = np.where(denominator > 0, 2 * du / denominator, 0)
+    return x0 + np.clip(dx_u, 0, dx)
+
+
+def eNu_table(time, sigma):
+    """Tabulate the distribution of events as a function of eNu at the values in eNu_grid.
+
+    sigma -- cross section (integrated over eE) at the values in eNu_grid
+    """
+    pdf = np.clip(sigma * flux.nu_emission(eNu_grid, time), 0, None)
+    return tabulate(eNu_grid, pdf)
+
+
+def get_eNu(u, table):
+    """Get energy of interacting neutrino using inverse transform sampling.
+
+    u -- uniformly distributed random number(s) in [0, 1); returns one energy for each
+    table -- distribution of events as a function of eNu, as returned by eNu_table()
+    """
+    eNu = inverse_cdf(u, eNu_grid, table)
     return eNu
 
 
-def get_direction(eNu):
-    """Get direction of outgoing particle using rejection sampling.
-    (Assumes that incoming neutrino with energy eNu moves in z direction.)
+def _cosT_table(i):
+    """Tabulate the distribution of dSigma_dCosT(eNu_grid[i], cosT) at the values in cosT_grid.
+
+    Return None if the cross section vanishes for all cosT (e.g. at threshold) or is invalid.
+    """
+    with np.errstate(invalid='ignore'):
+        pdf = dSigma_dCosT(eNu_grid[i], cosT_grid)
+    if not np.all(pdf >= 0) or not pdf.any():
+        return None
+    return tabulate(cosT_grid, pdf)
+
+
+def get_cosT(eNu, u):
+    """Get cosine of the angle between incoming neutrino and outgoing particle using inverse transform sampling.
+
+    The distribution is tabulated at the two neighbouring values in eNu_grid
+    and the resulting values of cosT are interpolated linearly in eNu.
+    If the distribution can't be tabulated at one of them, only the other one is used.
+
+    u -- uniformly distributed random number in [0, 1)
     """
-    def dist(cosT):
-        return channel.dSigma_dCosT(eNu, cosT)
-    cosT = rejection_sample(dist, -1, 1, 200)
-    sinT = sin(acos(cosT))
-    phi = 2 * pi * random.random()  # randomly distributed in [0, 2 pi)
-    return (sinT * cos(phi), sinT * sin(phi), cosT)
+    i = min(np.searchsorted(eNu_grid, eNu, side='right'), len(eNu_grid) - 1)  # eNu_grid[i-1] <= eNu <= eNu_grid[i]
+    w = (eNu - eNu_grid[i - 1]) / (eNu_grid[i] - eNu_grid[i - 1])
+    lower, upper = cosT_table(i - 1), cosT_table(i)
+    if lower is None and upper is None:
+        raise ValueError(f"dSigma_dCosT vanishes for all cosT near E_nu={eNu}. Aborting...")
+    if lower is None:
+        lower, w = upper, 1
+    elif upper is None:
+        upper, w = lower, 0
+    cosT = (1 - w) * inverse_cdf(u, cosT_grid, lower) + w * inverse_cdf(u, cosT_grid, upper)
+    return cosT
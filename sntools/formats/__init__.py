@@ -45,7 +45,7 @@ class BaseFlux(ABC):
         This does not include the geometry factor 1/(4 pi r**2).
 
         Arguments:
-        eNu -- neutrino energy
+        eNu -- neutrino energy (float or numpy array; if array, return an array of the same shape)
         time -- time ;)
         """
         pass
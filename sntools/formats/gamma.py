@@ -7,7 +7,8 @@ with one entry per line. We assume that the data follows a gamma distribution
 See the file 'fluxes/sample-gamma.txt' for details.
 """
 
-from math import gamma, exp
+from math import gamma
+import numpy as np
 from scipy import interpolate
 from sntools.formats import BaseFlux, get_endtime, get_starttime
 
@@ -94,6 +95,6 @@ class Flux(BaseFlux):
         alpha = (2 * e ** 2 - e_sq) / (e_sq - e ** 2)
 
         # energy of neutrinos follows a gamma distribution
-        gamma_dist = eNu ** alpha / gamma(alpha + 1) * ((alpha + 1) / e) ** (alpha + 1) * exp(-(alpha + 1) * eNu / e)
+        gamma_dist = eNu ** alpha / gamma(alpha + 1) * ((alpha + 1) / e) ** (alpha + 1) * np.exp(-(alpha + 1) * eNu / e)
         # total number = luminosity / mean energy
         return luminosity / e * gamma_dist
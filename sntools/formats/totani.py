@@ -7,6 +7,7 @@ in the raw input files. We fix this when reading from the files in _parse().
 """
 
 from math import log10
+import numpy as np
 from scipy.interpolate import InterpolatedUnivariateSpline
 from sntools.formats import BaseFlux, get_endtime, get_raw_times, get_starttime
 
@@ -106,7 +107,7 @@ class Flux(BaseFlux):
         time -- time ;)
         """
         f = self.log_spectrum[time]
-        return 10 ** f(log10(eNu))  # transform log back to actual value
+        return 10 ** f(np.log10(eNu))  # transform log back to actual value
 
     # Helper functions
     def _parse(self, input, format, flv):
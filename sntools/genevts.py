@@ -4,7 +4,11 @@ import argparse
 from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
 from importlib import import_module
+import os
 import random
+import sys
+
+import numpy as np
 
 try:
     import snewpy  # noqa
@@ -16,8 +20,6 @@ try:
     import sntools  # if sntools was installed via pip
 except ImportError:
     # if running this directly from the repo, modify `sys.path` to ensure all imports work
-    import os
-    import sys
     abs_dir = os.path.dirname(os.path.abspath(__file__))
     parent_dir = os.path.dirname(abs_dir)
     sys.path.append(parent_dir)
@@ -37,19 +39,32 @@ def main():
     flux_at_detector = args.flux.transformed_by(args.transformation, args.distance)
 
     # Generate events for each (sub-)channel and combine them
-    pool = ProcessPoolExecutor(max_workers=args.maxworkers)
-    results = []
+    jobs = []
     for channel in sorted(args.channels):
         mod_channel = import_module("sntools.interaction_channels." + channel)
         n_targets = args.detector.n_molecules * args.detector.material["channel_weights"][channel]
         for flv in mod_channel.possible_flavors:
             channel_instance = mod_channel.Channel(flv)
             for flux in flux_at_detector.components[flv]:
-                results.append(pool.submit(gen_evts, channel_instance, flux, n_targets, args.randomseed + random.random(), args.verbose))
+                jobs.append((channel_instance, flux, n_targets))
+
+    # If there are fewer (sub-)channels than workers, use remaining workers to parallelize within each one
+    max_workers = args.maxworkers or os.cpu_count() or 1
+    if sys.platform == "win32":
+        max_workers = min(max_workers, 61)  # ProcessPoolExecutor raises ValueError for more workers on Windows
+    workers_per_job = max(1, max_workers // max(1, len(jobs)))
+
+    # Each job gets an independent random number stream, derived from the same seed.
+    seeds = np.random.SeedSequence(args.randomseed).spawn(len(jobs))
 
     events = []
-    for result in as_completed(results):
-        events.extend(result.result())
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        results = []
+        for (channel_instance, flux, n_targets), seed in zip(jobs, seeds):
+            results.append(pool.submit(gen_evts, channel_instance, flux, n_targets, seed, args.verbose, workers_per_job))
+
+        for result in as_completed(results):
+            events.extend(result.result())
 
     # Sort events by time and write them to an output file
     events.sort(key=lambda evt: evt.time)
@@ -2,6 +2,15 @@ from abc import ABC, abstractmethod
 
 from sntools.event import Event
 
+try:
+    from numba import njit  # optional; compiles numerical hot paths to machine code
+except ImportError:
+    def njit(*args, **kwargs):
+        """Fallback if numba is not installed: leave the decorated function unchanged."""
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda f: f
+
 
 cherenkov_threshold = 0.77  # Cherenkov threshold of electron/positron in water
 
@@ -95,8 +104,9 @@ class BaseChannel(ABC):
         return self.bounds_eNu
 
     def _opts(self, eNu, *args):
-        """Options for numerical integration with `scipy.nquad`.
+        """Options for numerical integration over eE.
 
-        Optional. Return a list of values of eE where dSigma_dE(eNu, eE) has a discontinuity, to reduce numerical inaccuracy.
+        Optional. Return a list of values of eE where dSigma_dE(eNu, eE) has a discontinuity.
+        The integration interval is split at these points to reduce numerical inaccuracy.
         """
         return {'points': []}
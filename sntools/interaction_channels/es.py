@@ -9,7 +9,7 @@ Note that it uses different conventions (e.g. minus signs) from Bahcall et al.!
 """
 
 from math import pi, sqrt, log
-from scipy import integrate
+from scipy import special
 
 from sntools.event import Event
 from sntools.interaction_channels import BaseChannel, cherenkov_threshold
@@ -24,12 +24,14 @@ mE = 0.5109989  # electron mass (MeV)
 gF = 1.16637e-11  # Fermi coupling constant
 rho_NC = 1.0126  # numerical factor from Bahcall et al.
 
-_cache = {}  # save time by avoiding repeat calculations
+
 def spence(n):
-    n = round(n, 6)  # negligible decrease in accuracy to save time & memory
-    if n not in _cache:
-        _cache[n] = integrate.quad(lambda t: log(abs(1 - t)) / t, 0, n)[0]
-    return _cache[n]
+    """Return integral of log(abs(1 - t)) / t from 0 to n.
+
+    This equals -Li2(n), so we use the closed form from scipy instead of numerical integration.
+    (Note that scipy.special.spence(x) is defined as Li2(1 - x).)
+    """
+    return -special.spence(1 - n)
 
 
 class Channel(BaseChannel):
@@ -149,7 +151,7 @@ class Channel(BaseChannel):
 
     eE_min = cherenkov_threshold
 
-    def bounds_eE(self, eNu, *args):  # ignore additional arguments handed over by integrate.nquad()
+    def bounds_eE(self, eNu, *args):  # additional arguments are ignored
         """Return kinematic bounds for integration over eE.
 
         Input:
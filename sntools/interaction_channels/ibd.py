@@ -4,7 +4,7 @@ Based on Strumia/Vissani (2003), arXiv:astro-ph/0302055.
 """
 
 from math import pi, sqrt, log
-from sntools.interaction_channels import BaseChannel
+from sntools.interaction_channels import BaseChannel, njit
 
 from sntools.event import Event
 
@@ -21,10 +21,124 @@ sigma0 = 2 * mP * gF**2 * 0.9746**2 / (8 * pi * mP**2)  # from eqs. (3), (11)
 delta_cm = (mN**2 - mP**2 - mE**2) / (2 * mP)
 eThr = ((mN + mE)**2 - mP**2) / (2 * mP)  # threshold energy for IBD: ca. 1.8 MeV
 
+# frequently used combinations of the constants above, to avoid recomputing them in abs_M_squared()
+mE2 = mE**2
+mAvg2 = mAvg**2
+mPi2 = mPi**2
+delta2 = delta**2
+mN2_minus_mP2 = mN**2 - mP**2
+
 # List of neutrino flavors ("e", "eb", "x", "xb") that interact in this channel.
 possible_flavors = ["eb"]
 
 
+# The numerical functions below are called hundreds of times for each generated event.
+# If numba is installed, they are compiled to machine code when this module is imported.
+@njit("float64(float64, float64)", cache=True)
+def abs_M_squared(eNu, eE):  # eq. (5)
+    """Return squared matrix element |M|^2 for given neutrino and positron energies.
+
+    All intermediate quantities are computed exactly once, since this is called
+    many times for each generated event.
+    """
+    # above eq. (11)
+    s_minus_u = 2 * mP * (eNu + eE) - mE2
+    t = mN2_minus_mP2 - 2 * mP * (eNu - eE)
+
+    # eq. (7)
+    x = 0 + t / (4 * mAvg2)
+    y = 1 - t / 710**2
+    z = 1 - t / 1030**2
+    denominator = (1 - x) * y**2
+    f1 = (1 - 4.706 * x) / denominator
+    f2 = 3.706 / denominator
+    g1 = -1.27 / z**2
+    g2 = 2 * g1 * mAvg2 / (mPi2 - t)
+
+    f1_sq, f2_sq, g1_sq, g2_sq = f1**2, f2**2, g1**2, g2**2
+    f1f2, g1g2 = f1 * f2, g1 * g2
+
+    A = (t - mE2) * (
+            4 * f1_sq * (4 * mAvg2 + t + mE2)
+            + 4 * g1_sq * (-4 * mAvg2 + t + mE2)
+            + f2_sq * (t**2 / mAvg2 + 4 * t + 4 * mE2)
+            + 4 * mE2 * t * g2_sq / mAvg2
+            + 8 * f1f2 * (2 * t + mE2)
+            + 16 * mE2 * g1g2) \
+        - delta2 * (
+            (4 * f1_sq + t * f2_sq / mAvg2) * (4 * mAvg2 + t - mE2)
+            + 4 * g1_sq * (4 * mAvg2 - t + mE2)
+            + 4 * mE2 * g2_sq * (t - mE2) / mAvg2
+            + 8 * f1f2 * (2 * t - mE2)
+            + 16 * mE2 * g1g2) \
+        - 32 * mE2 * mAvg * delta * g1 * (f1 + f2)
+    A /= 16
+
+    B = 16 * t * g1 * (f1 + f2) + 4 * mE2 * delta * (f2_sq + f1f2 + 2 * g1g2) / mAvg
+    B /= 16
+
+    C = 4 * (f1_sq + g1_sq) - t * f2_sq / mAvg2
+    C /= 16
+
+    return A - B * s_minus_u + C * s_minus_u**2
+
+
+@njit("float64(float64, float64)", cache=True)
+def _get_eE(eNu, cosT):  # eq. (21)
+    epsilon = eNu / mP
+    kappa = (1 + epsilon)**2 - (epsilon * cosT)**2
+    root = max(0.0, (eNu - delta_cm)**2 - mE**2 * kappa)  # can be slightly negative just above threshold due to rounding
+    return ((eNu - delta_cm) * (1 + epsilon) + epsilon * cosT * sqrt(root)) / kappa
+
+
+@njit("UniTuple(float64, 2)(float64)", cache=True)
+def _bounds_eE(eNu):
+    s = 2 * mP * eNu + mP**2
+    pE_cm = sqrt((s - (mN - mE)**2) * (s - (mN + mE)**2)) / (2 * sqrt(s))
+    eE_cm = (s - mN**2 + mE**2) / (2 * sqrt(s))
+
+    eE_min = eNu - delta_cm - eNu / sqrt(s) * (eE_cm + pE_cm)
+    eE_max = eNu - delta_cm - eNu / sqrt(s) * (eE_cm - pE_cm)
+    return (eE_min, eE_max)
+
+
+@njit("float64(float64, float64)", cache=True)
+def _dSigma_dE_in_bounds(eNu, eE):  # eqs. (11), (3)
+    # Assumes that eNu is above threshold and eE is within kinematic bounds.
+    rad_correction = alpha / pi * (6.00352 + 3 / 2 * log(mP / (2 * eE)) + 1.2 * (mE / eE)**1.5)  # eq. (14)
+    return sigma0 / eNu**2 * abs_M_squared(eNu, eE) * (1 + rad_correction)
+
+
+@njit("float64(float64, float64)", cache=True)
+def _dSigma_dE(eNu, eE):  # eqs. (11), (3)
+    if eNu < eThr:
+        return 0.0
+    eE_min, eE_max = _bounds_eE(eNu)
+    if eE < eE_min or eE > eE_max:
+        return 0.0
+    return _dSigma_dE_in_bounds(eNu, eE)
+
+
+@njit("float64(float64, float64)", cache=True)
+def _dSigma_dCosT(eNu, cosT):  # eq. (20)
+    if eNu <= eThr or abs(cosT) > 1:  # at threshold, eq. (21) is numerically unstable
+        return 0.0
+    # For any cosT in [-1, 1], eq. (21) gives eE within the kinematic bounds, so we don't need
+    # to calculate them (which only depend on eNu) again for each value of cosT.
+    epsilon = eNu / mP
+    eE = _get_eE(eNu, cosT)
+    pE = sqrt(eE**2 - mE**2)
+    dE_dCosT = pE * epsilon / (1 + epsilon * (1 - cosT * eE / pE))
+    return dE_dCosT * _dSigma_dE_in_bounds(eNu, eE)
+
+
+def _check_threshold(eNu):
+    # Below threshold, the kinematics are undefined. The compiled kernels would return NaN
+    # (instead of raising an error like the pure Python versions), so check explicitly.
+    if eNu < eThr:
+        raise ValueError(f"Neutrino energy E_nu={eNu} is below the IBD threshold of {eThr} MeV.")
+
+
 class Channel(BaseChannel):
     def generate_event(self, eNu, dirx, diry, dirz):
         """Return an event with the appropriate incoming/outgoing particles.
@@ -50,47 +164,7 @@ class Channel(BaseChannel):
             eNu: neutrino energy
             eE:  energy of outgoing (detected) particle
         """
-        if eNu < eThr or eE < self.bounds_eE(eNu)[0] or eE > self.bounds_eE(eNu)[1]:
-            return 0
-        # above eq. (11)
-        s_minus_u = 2 * mP * (eNu + eE) - mE**2
-        t = mN**2 - mP**2 - 2 * mP * (eNu - eE)
-
-        # eq. (7)
-        x = 0 + t / (4 * mAvg**2)
-        y = 1 - t / 710**2
-        z = 1 - t / 1030**2
-        f1 = (1 - 4.706 * x) / ((1 - x) * y**2)
-        f2 = 3.706 / ((1 - x) * y**2)
-        g1 = -1.27 / z**2
-        g2 = 2 * g1 * mAvg**2 / (mPi**2 - t)
-
-        A = (t - mE**2) * (
-                4 * f1**2 * (4 * mAvg**2 + t + mE**2)
-                + 4 * g1**2 * (-4 * mAvg**2 + t + mE**2)
-                + f2**2 * (t**2 / mAvg**2 + 4 * t + 4 * mE**2)
-                + 4 * mE**2 * t * g2**2 / mAvg**2
-                + 8 * f1 * f2 * (2 * t + mE**2)
-                + 16 * mE**2 * g1 * g2) \
-            - delta**2 * (
-                (4 * f1**2 + t * f2**2 / mAvg**2) * (4 * mAvg**2 + t - mE**2)
-                + 4 * g1**2 * (4 * mAvg**2 - t + mE**2)
-                + 4 * mE**2 * g2**2 * (t - mE**2) / mAvg**2
-                + 8 * f1 * f2 * (2 * t - mE**2)
-                + 16 * mE**2 * g1 * g2) \
-            - 32 * mE**2 * mAvg * delta * g1 * (f1 + f2)
-        A /= 16
-
-        B = 16 * t * g1 * (f1 + f2) + 4 * mE**2 * delta * (f2**2 + f1 * f2 + 2 * g1 * g2) / mAvg
-        B /= 16
-
-        C = 4 * (f1**2 + g1**2) - t * f2**2 / mAvg**2
-        C /= 16
-
-        abs_M_squared = A - B * s_minus_u + C * s_minus_u**2  # eq. (5)
-        rad_correction = alpha / pi * (6.00352 + 3 / 2 * log(mP / (2 * eE)) + 1.2 * (mE / eE)**1.5)  # eq. (14)
-
-        result = sigma0 / eNu**2 * abs_M_squared * (1 + rad_correction)
+        result = _dSigma_dE(eNu, eE)
 
         if result < 0:
             raise ValueError(f"Calculated negative cross section for E_nu={eNu}, E_e={eE}. Aborting...")
@@ -104,11 +178,12 @@ class Channel(BaseChannel):
             eNu:  neutrino energy (MeV)
             cosT: cosine of the angle between neutrino and outgoing (detected) particle
         """
-        epsilon = eNu / mP
-        eE = self.get_eE(eNu, cosT)
-        pE = sqrt(eE**2 - mE**2)
-        dE_dCosT = pE * epsilon / (1 + epsilon * (1 - cosT * eE / pE))
-        return dE_dCosT * self.dSigma_dE(eNu, eE)
+        result = _dSigma_dCosT(eNu, cosT)
+
+        if result < 0:
+            raise ValueError(f"Calculated negative cross section for E_nu={eNu}, cosT={cosT}. Aborting...")
+
+        return result
 
     def get_eE(self, eNu, cosT):  # eq. (21)
         """Return energy (in MeV) of outgoing (detected) particle.
@@ -117,9 +192,8 @@ class Channel(BaseChannel):
             eNu:  neutrino energy (in MeV)
             cosT: cosine of the angle between neutrino and outgoing (detected) particle
         """
-        epsilon = eNu / mP
-        kappa = (1 + epsilon)**2 - (epsilon * cosT)**2
-        return ((eNu - delta_cm) * (1 + epsilon) + epsilon * cosT * sqrt((eNu - delta_cm)**2 - mE**2 * kappa)) / kappa
+        _check_threshold(eNu)
+        return _get_eE(eNu, cosT)
 
     def get_neutron_kinematics(self, eNu, eE, dirx, diry, dirz):
         eN = mP + eNu - eE  # neutron energy
@@ -140,15 +214,10 @@ class Channel(BaseChannel):
             eNu:  neutrino energy (in MeV)
             args: [ignore this]
         Output:
-            list with minimum & maximum allowed energy of outgoing (detected) particle
+            tuple with minimum & maximum allowed energy of outgoing (detected) particle
         """
-        s = 2 * mP * eNu + mP**2
-        pE_cm = sqrt((s - (mN - mE)**2) * (s - (mN + mE)**2)) / (2 * sqrt(s))
-        eE_cm = (s - mN**2 + mE**2) / (2 * sqrt(s))
-
-        eE_min = eNu - delta_cm - eNu / sqrt(s) * (eE_cm + pE_cm)
-        eE_max = eNu - delta_cm - eNu / sqrt(s) * (eE_cm - pE_cm)
-        return [eE_min, eE_max]
+        _check_threshold(eNu)
+        return _bounds_eE(eNu)
 
     # Bounds for integration over eNu
     bounds_eNu = [eThr, 100]
@@ -132,7 +132,7 @@ class Channel(BaseChannel):
         return (eE + fit_parameters[1][0] - epsilon, eE + fit_parameters[4][0] + epsilon)
 
     def _opts(self, eNu, *args):
-        """Options for numerical integration with `scipy.nquad`."""
+        """Options for numerical integration over eE."""
         # values of eE where dSigma_dE(eNu, eE) has a discontinuity, to increase accuracy
         p = []
         for g in range(1, 5):
@@ -0,0 +1,55 @@
+import unittest
+
+import numpy as np
+
+from sntools import channel
+from sntools.channel import inverse_cdf, tabulate
+from sntools.interaction_channels import es
+
+
+class InverseCdfTest(unittest.TestCase):
+    def test_tabulate(self):
+        x = np.array([0, 0.3, 0.5, 1.0])
+        pdf, cdf = tabulate(x, np.array([0, 1, 1, 0]))
+        self.assertAlmostEqual(cdf[0], 0)
+        self.assertAlmostEqual(cdf[-1], 1)
+        self.assertAlmostEqual(cdf[1], 0.15 / 0.6)
+        self.assertAlmostEqual(pdf[1], 1 / 0.6)
+
+    def test_linear_pdf(self):
+        # pdf(x) = 2x on [0, 1] has cdf(x) = x**2, which is sampled exactly
+        x = np.linspace(0, 1, 5)
+        table = tabulate(x, 2 * x)
+        u = np.linspace(0, 0.999, 50)
+        np.testing.assert_allclose(inverse_cdf(u, x, table), np.sqrt(u), rtol=1e-12, atol=1e-12)
+
+    def test_constant_pdf(self):
+        x = np.array([-1, -0.2, 0.5, 1.0])
+        table = tabulate(x, np.ones_like(x))
+        u = np.linspace(0, 0.999, 50)
+        np.testing.assert_allclose(inverse_cdf(u, x, table), 2 * u - 1, rtol=1e-12, atol=1e-12)
+
+    def test_zero_interval(self):
+        # no values should be sampled where the pdf vanishes
+        x = np.linspace(0, 4, 5)
+        table = tabulate(x, np.array([1, 1, 0, 0, 1]))
+        samples = inverse_cdf(np.linspace(0, 0.999, 1000), x, table)
+        self.assertFalse(np.any((samples > 2) & (samples < 3)))
+
+
+class GetCosTTest(unittest.TestCase):
+    def test_es_near_lower_bound(self):
+        # ES cross section vanishes for all cosT at the lowest value of eNu_grid;
+        # backward scattering must not be sampled close to it
+        channel.set_up(es.Channel('e'), None)
+        eNu = (channel.eNu_grid[0] + channel.eNu_grid[1]) / 2
+        for u in np.linspace(0, 0.999, 100):
+            self.assertGreaterEqual(channel.get_cosT(eNu, u), 0)
+
+    def test_cosT_cache_kept_for_same_channel(self):
+        channel.set_up(es.Channel('e'), None)
+        table = channel.cosT_table
+        channel.set_up(es.Channel('e'), None)
+        self.assertIs(channel.cosT_table, table)
+        channel.set_up(es.Channel('eb'), None)
+        self.assertIsNot(channel.cosT_table, table)
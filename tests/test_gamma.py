@@ -1,5 +1,7 @@
 import unittest
 
+import numpy as np
+
 from sntools.formats import gamma
 
 
@@ -71,6 +73,12 @@ class NuEmissionTest(unittest.TestCase):
             # algorithm change between different versions of scipy)
             self.assertAlmostEqual(self.f.nu_emission(eNu, time), result, delta=2e-3 * result)
 
+    def test_nu_emission_array(self):
+        eNus = [3, 10, 50]
+        results = self.f.nu_emission(np.array(eNus), 109)
+        for (eNu, result) in zip(eNus, results):
+            self.assertAlmostEqual(self.f.nu_emission(eNu, 109), result, delta=1e-12 * result)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -59,6 +59,12 @@ class IBDTest(CrossSectionTest):
     # value of bounds_eNu[0]
     test_bounds_eNu_minvalue = 1.8060455572837861
 
+    def test_below_threshold_raises(self):
+        with self.assertRaises(ValueError):
+            self.c.get_eE(1.0, 0.5)
+        with self.assertRaises(ValueError):
+            self.c.bounds_eE(1.0)
+
 
 # ensure that unittest doesn't run tests in the base class, via https://stackoverflow.com/a/22836015
 del CrossSectionTest